@@ -0,0 +1,33 @@
+"""JSON helpers shared by main.py, reply_engine.py and send_summary.py.
+
+Uses orjson when it is installed and falls back to stdlib json otherwise.
+Kept dependency-free so importing it never drags in the browser or reply stack.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional C parser — stdlib json covers the same calls
+    orjson = None
+
+
+def json_loads(data):
+    """Parse a JSON payload (str or bytes), via orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj) -> str:
+    """Serialize to a UTF-8 JSON string (non-ASCII kept as-is)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, ensure_ascii=False)
+
+
+def json_dumps_bytes(obj) -> bytes:
+    """Serialize to UTF-8 JSON bytes for writing to a file opened in "wb" mode."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
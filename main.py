@@ -4,6 +4,7 @@ new Env("Linux.Do 签到")
 """
 
 import os
+import gc
 import random
 import time
 import json
@@ -12,6 +13,7 @@ import functools
 import threading
 import subprocess
 from datetime import datetime, timezone, timedelta
+from typing import Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from loguru import logger
 from DrissionPage import ChromiumOptions, Chromium
@@ -19,6 +21,9 @@ from tabulate import tabulate
 from curl_cffi import requests
 from bs4 import BeautifulSoup
 from notify import NotificationManager
+from rate_limiter import limiter
+from jsonutil import json_dumps_bytes, json_loads
+from reply_engine import current_run_slot, execute_reply, get_reply_run, stable_hash
 
 
 def retry_decorator(retries=3, base_delay=3, backoff_factor=2, max_delay=30):
@@ -75,6 +80,18 @@ FORCE_REPLY_ALL = os.environ.get("FORCE_REPLY_ALL", "false").strip().lower() in
     "on",
 ]
 
+# Accounts processed in parallel within one job (each gets its own browser)
+ACCOUNT_CONCURRENCY = max(1, int(os.environ.get("ACCOUNT_CONCURRENCY") or "3"))
+
+# Spacing (s) between account starts. Sequential (ACCOUNT_CONCURRENCY=1): each
+# account after the first waits ACCOUNT_DELAY..ACCOUNT_DELAY+15s, as it always has.
+# Parallel: each worker waits a random 0..ACCOUNT_DELAY s before starting, on top of
+# the limiter's minimum gap between account starts.
+ACCOUNT_DELAY = int(os.environ.get("ACCOUNT_DELAY") or "60")
+
+# Force a gc.collect() after every N finished accounts
+GC_EVERY = max(1, int(os.environ.get("GC_EVERY") or "5"))
+
 # Beijing timezone (UTC+8)
 _BJT = timezone(timedelta(hours=8))
 
@@ -90,7 +107,7 @@ def should_read_bookmarks_today(username: str) -> bool:
     weekday = now_bjt.weekday()  # 0=Mon..6=Sun
 
     # Pick 1-3 days this week, seeded by username + week
-    seed = int(hashlib.md5(f"bookmark:{username}:{week_number}".encode()).hexdigest(), 16)
+    seed = stable_hash(f"bookmark:{username}:{week_number}")
     rng = random.Random(seed)
     count = rng.randint(1, 3)
     days = sorted(rng.sample(range(7), count))
@@ -99,10 +116,8 @@ def should_read_bookmarks_today(username: str) -> bool:
         return False
 
     # Morning/evening slot — same slot the account uses for replies
-    h = int(hashlib.md5(username.encode()).hexdigest(), 16)
-    assigned_slot = "morning" if h % 2 == 0 else "evening"
-    utc_hour = datetime.now(timezone.utc).hour
-    current_slot = "morning" if utc_hour < 10 else "evening"
+    assigned_slot = get_reply_run(username)
+    current_slot = current_run_slot(now_bjt)
 
     if assigned_slot != current_slot:
         return False
@@ -166,17 +181,38 @@ def _cleanup_chrome_processes():
         pass  # non-critical — best effort cleanup
 
 
+# Under concurrency, how long a worker waits for memory to drop below 90%
+# before launching its browser anyway, and how often it re-checks
+_MEMORY_WAIT_TIMEOUT = 300
+_MEMORY_POLL_INTERVAL = 5
+
+
 def _check_memory_and_cleanup():
     """Circuit-breaker: force Chrome cleanup if memory usage exceeds 90%.
 
     GitHub Actions runners have ~7GB RAM. Multiple headless Chrome instances
     can easily exhaust this, causing OOM kills that cascade to all remaining accounts.
+    With parallel accounts the cleanup would kill siblings' browsers, so the
+    caller waits (bounded) for memory to come back down instead.
     """
     from sys import platform
     if not platform.startswith("linux"):
         return
     mem_pct = _get_memory_percent()
     if mem_pct > 90:
+        if ACCOUNT_CONCURRENCY > 1:
+            # pkill would take down the browsers of sibling accounts mid-run, so
+            # hold this worker back until they finish and free memory instead
+            logger.warning(f"Memory critical: {mem_pct:.1f}% used, waiting before starting another browser")
+            deadline = time.monotonic() + _MEMORY_WAIT_TIMEOUT
+            while mem_pct > 90 and time.monotonic() < deadline:
+                time.sleep(_MEMORY_POLL_INTERVAL)
+                mem_pct = _get_memory_percent()
+            if mem_pct > 90:
+                logger.warning(f"Memory still at {mem_pct:.1f}% after {_MEMORY_WAIT_TIMEOUT}s, starting anyway")
+            else:
+                logger.info(f"Memory back to {mem_pct:.1f}%, continuing")
+            return
         logger.warning(f"Memory critical: {mem_pct:.1f}% used, forcing Chrome cleanup")
         _cleanup_chrome_processes()
         time.sleep(2)  # let OS reclaim memory
@@ -274,6 +310,10 @@ class LinuxDoBrowser:
             .set_argument("--disable-dev-shm-usage")
         )
         co.set_user_agent(ua)
+        if ACCOUNT_CONCURRENCY > 1:
+            # Parallel accounts need their own debug port + profile dir,
+            # otherwise every Chromium() attaches to the same browser on 9222
+            co.auto_port()
         self.browser = Chromium(co)
         self.page = self.browser.new_tab()
 
@@ -302,6 +342,14 @@ class LinuxDoBrowser:
         # Connect info (trust level + stats table from connect.linux.do)
         self.connect_info = None
 
+    def close(self):
+        """Tear down the tab, the Chromium process and the API session."""
+        for closer in (self.page.close, self.browser.quit, self.session.close):
+            try:
+                closer()
+            except Exception:
+                pass
+
     def _wait(self, base_min, base_max):
         """Sleep for a personality-adjusted random duration."""
         t = random.uniform(base_min, base_max) * self._speed
@@ -653,72 +701,61 @@ class LinuxDoBrowser:
             self.log.info(f"等待 {wait_time:.2f} 秒...")
 
     def run(self):
+        """Login, browse and reply. Teardown is the caller's job (see _run_one)."""
         self.reply_result = None  # Track reply result (dict or None)
         self.login_success = False  # Track whether login actually worked
-        try:
-            login_res = self.login()
-            if login_res == "rate_limited":
-                raise Exception(f"RATE_LIMITED:{getattr(self, '_rate_limit_wait', 60)}")
-            if not login_res:
-                self.log.warning("登录验证失败，跳过浏览")
-                self._save_debug_info("login_failed")
-                return
+        login_res = self.login()
+        if login_res == "rate_limited":
+            raise Exception(f"RATE_LIMITED:{getattr(self, '_rate_limit_wait', 60)}")
+        if not login_res:
+            self.log.warning("登录验证失败，跳过浏览")
+            self._save_debug_info("login_failed")
+            return
+
+        self.login_success = True
+
+        if BROWSE_ENABLED:
+            # Some users just login and leave (~15% chance)
+            if random.random() < 0.15:
+                self.log.info("模拟快速登录用户，跳过浏览")
+            else:
+                # Occasionally check notifications or profile first (~20%)
+                if random.random() < 0.20:
+                    self.visit_side_page()
+
+                # Browse homepage first like a real user
+                self.browse_homepage()
+                click_topic_res = self.click_topic()
+                if not click_topic_res:
+                    self.log.error("点击主题失败，程序终止")
+                    self._save_debug_info("click_topic_failed")
+                    return
+                self.log.info("完成浏览任务")
+
+                # Read from bookmarks on scheduled days (1-3 days/week)
+                if should_read_bookmarks_today(self.username):
+                    self.read_from_bookmarks()
+
+                # Sometimes check notifications after browsing too (~15%)
+                if random.random() < 0.15:
+                    self.visit_side_page()
 
-            self.login_success = True
+        self.send_notifications(BROWSE_ENABLED)  # 发送通知
 
-            if BROWSE_ENABLED:
-                # Some users just login and leave (~15% chance)
-                if random.random() < 0.15:
-                    self.log.info("模拟快速登录用户，跳过浏览")
-                else:
-                    # Occasionally check notifications or profile first (~20%)
-                    if random.random() < 0.20:
-                        self.visit_side_page()
-
-                    # Browse homepage first like a real user
-                    self.browse_homepage()
-                    click_topic_res = self.click_topic()
-                    if not click_topic_res:
-                        self.log.error("点击主题失败，程序终止")
-                        self._save_debug_info("click_topic_failed")
-                        return
-                    self.log.info("完成浏览任务")
-
-                    # Read from bookmarks on scheduled days (1-3 days/week)
-                    if should_read_bookmarks_today(self.username):
-                        self.read_from_bookmarks()
-
-                    # Sometimes check notifications after browsing too (~15%)
-                    if random.random() < 0.15:
-                        self.visit_side_page()
-
-            self.send_notifications(BROWSE_ENABLED)  # 发送通知
-
-            # Auto-reply phase (after browse, gated by REPLY_ENABLED or FORCE_REPLY_ALL)
-            if REPLY_ENABLED or FORCE_REPLY_ALL:
-                try:
-                    from reply_engine import execute_reply
-                    self.reply_result = execute_reply(
-                        self,
-                        bot_usernames=getattr(self, "_bot_usernames", set()),
-                        used_topics=getattr(self, "_used_topics", set()),
-                        used_phrases=getattr(self, "_used_phrases", set()),
-                        force=FORCE_REPLY_ALL,
-                    )
-                except Exception as e:
-                    self.log.error(f"[Reply] Reply phase failed: {e}")
-                    self.reply_result = None
-        finally:
-            try:
-                self.page.close()
-            except Exception:
-                pass
+        # Auto-reply phase (after browse, gated by REPLY_ENABLED or FORCE_REPLY_ALL)
+        if REPLY_ENABLED or FORCE_REPLY_ALL:
             try:
-                self.browser.quit()
-            except Exception:
-                pass
-            # Kill any orphaned chrome processes left by this instance
-            _cleanup_chrome_processes()
+                self.reply_result = execute_reply(
+                    self,
+                    bot_usernames=getattr(self, "_bot_usernames", frozenset()),
+                    used_topics=getattr(self, "_used_topics", set()),
+                    used_phrases=getattr(self, "_used_phrases", set()),
+                    force=FORCE_REPLY_ALL,
+                    rng=getattr(self, "_rng", None),
+                )
+            except Exception as e:
+                self.log.error(f"[Reply] Reply phase failed: {e}")
+                self.reply_result = None
 
     def visit_side_page(self):
         """Occasionally visit notifications, profile, or categories like a real user."""
@@ -860,10 +897,10 @@ class LinuxDoBrowser:
                 self.page.run_js(f"window.scrollBy({{top: {scroll}, behavior: 'smooth'}})")
                 self._wait(1.5, 3)
 
-            # Find bookmarked topic links
-            bookmark_links = self.page.eles("css:.bookmark-list .topic-link a") or \
-                             self.page.eles("css:.topic-list-item .link-top-line a") or \
-                             self.page.eles("css:a.title")
+            # Find bookmarked topic links — one compound selector, one CDP query
+            bookmark_links = self.page.eles(
+                "css:.bookmark-list .topic-link a, .topic-list-item .link-top-line a, a.title"
+            )
 
             if not bookmark_links:
                 self.log.info("[Bookmark] 书签列表为空或未找到帖子链接")
@@ -922,7 +959,7 @@ class LinuxDoBrowser:
                 """)
 
                 if info:
-                    table_data = json.loads(info)
+                    table_data = json_loads(info)
                     print("--------------Connect Info-----------------")
                     print(tabulate(table_data, headers=["项目", "当前", "要求"], tablefmt="pretty"))
                     # Store for results JSON and email summary
@@ -952,7 +989,7 @@ class LinuxDoBrowser:
                 }}).then(r => r.ok ? r.text() : '');
             """)
             if result:
-                data = json.loads(result)
+                data = json_loads(result)
                 user_data = data.get("user", {})
                 trust_level = user_data.get("trust_level")
                 if trust_level is not None:
@@ -996,27 +1033,113 @@ def get_accounts():
     return []
 
 
+def _account_seed(username: str, daily_seed: int) -> int:
+    """Derive a per-account PRNG seed from the job's daily master seed."""
+    return stable_hash(f"{username}:{daily_seed}")
+
+
+def _interleave_by_reply_slot(accounts: list) -> list:
+    """Alternate morning/evening reply-slot accounts so neither group clumps together.
+
+    Order within each slot group is preserved, so the result stays deterministic
+    for a given daily shuffle.
+    """
+    morning, evening = [], []
+    for a in accounts:
+        (morning if get_reply_run(a.get("username", "")) == "morning" else evening).append(a)
+    interleaved = []
+    for idx in range(max(len(morning), len(evening))):
+        interleaved.extend(group[idx] for group in (morning, evening) if idx < len(group))
+    return interleaved
+
+
 # Thread-safe lists for tracking results
 _results_lock = threading.Lock()
 
+# Finished accounts since the last forced gc.collect()
+_gc_lock = threading.Lock()
+_accounts_since_gc = 0
 
-def process_account(account, index, total):
-    """Process a single account. Returns (username, success: bool)."""
+# At most ACCOUNT_CONCURRENCY browsers alive at once (bounds Chrome RSS)
+_browser_slots = threading.Semaphore(ACCOUNT_CONCURRENCY)
+
+
+def _collect_garbage_periodically():
+    """Run gc.collect() once every GC_EVERY finished accounts (thread-safe)."""
+    global _accounts_since_gc
+    with _gc_lock:
+        _accounts_since_gc += 1
+        if _accounts_since_gc < GC_EVERY:
+            return
+        _accounts_since_gc = 0
+    gc.collect()
+
+
+def _run_one(account: dict, idx: int, total: int, bot_usernames: frozenset,
+             used_topics: set, used_phrases: set, rng: random.Random,
+             delay_range: Tuple[float, float], retry: bool = False
+             ) -> Tuple[str, str, Optional[dict]]:
+    """Run one account end-to-end: jittered start, browser lifecycle, cleanup.
+
+    Shared by the main pass and the rate-limit retry pass. Returns
+    (status, username, outcome) with status "ok", "fail" or "rate_limited";
+    outcome holds reply/like/connect-info results for "ok" and the suggested
+    wait_secs for "rate_limited".
+    """
+    label = f"Retry {idx}/{total}" if retry else f"{idx}/{total}"
     username = account.get("username", "")
     password = account.get("password", "")
     if not username or not password:
-        logger.warning(f"[{index}/{total}] Skipping account with missing username/password")
-        return (username or f"account_{index}", False)
+        logger.warning(f"[{label}] Skipping account with missing username/password")
+        return ("fail", username or f"account_{idx}", None)
 
-    logger.info(f"========== [{index}/{total}] Processing: {username} ==========")
-    try:
-        browser = LinuxDoBrowser(username, password)
-        browser.run()
-        logger.success(f"[{index}/{total}] Account {username} completed successfully")
-        return (username, True)
-    except Exception as e:
-        logger.error(f"[{index}/{total}] Account {username} failed: {e}")
-        return (username, False)
+    delay = limiter.acquire("account", *delay_range, rng=rng)
+    logger.info(f"[{label}] Waited {delay:.1f}s before starting {username}")
+
+    with _browser_slots:
+        logger.info(f"========== [{label}] Processing: {username} ==========")
+        _check_memory_and_cleanup()  # circuit-breaker: cleanup if memory > 90%
+        browser = None
+        try:
+            browser = LinuxDoBrowser(username, password)
+            browser._bot_usernames = bot_usernames
+            browser._used_topics = used_topics
+            browser._used_phrases = used_phrases
+            browser._rng = rng
+            browser.run()
+            if not browser.login_success:
+                logger.warning(f"[{label}] Account {username} login failed")
+                return ("fail", username, None)
+            logger.success(f"[{label}] Account {username} completed successfully (likes: {browser.like_count}/{browser.like_attempts})")
+            return ("ok", username, {
+                "reply_result": browser.reply_result,
+                "like_count": browser.like_count,
+                "like_attempts": browser.like_attempts,
+                "connect_info": browser.connect_info,
+            })
+        except Exception as e:
+            error_msg = str(e)
+            if "RATE_LIMITED" in error_msg:
+                # Extract wait time from error message
+                try:
+                    wait_secs = int(error_msg.split(":")[1])
+                except (IndexError, ValueError):
+                    wait_secs = 120
+                logger.warning(f"[{label}] Account {username} hit rate limit")
+                return ("rate_limited", username, {"wait_secs": wait_secs})
+            logger.error(f"[{label}] Account {username} failed: {e}")
+            return ("fail", username, None)
+        finally:
+            # Single teardown point: release Chromium now rather than whenever
+            # the object is collected
+            if browser is not None:
+                browser.close()
+            # Kill any orphaned chrome processes left by this instance.
+            # pkill matches every headless chrome, so only safe when no
+            # sibling accounts are running in parallel.
+            if ACCOUNT_CONCURRENCY <= 1:
+                _cleanup_chrome_processes()
+            _collect_garbage_periodically()
 
 
 if __name__ == "__main__":
@@ -1045,11 +1168,12 @@ if __name__ == "__main__":
     # Shuffle accounts using today's date as seed so all jobs agree on the order
     from datetime import date
     daily_seed = int(date.today().strftime("%Y%m%d"))
+    master_rng = random.Random(daily_seed)
     shuffled = list(all_accounts)
-    random.Random(daily_seed).shuffle(shuffled)
+    master_rng.shuffle(shuffled)
 
-    # Split shuffled accounts evenly across jobs
     accounts = [a for idx, a in enumerate(shuffled) if idx % JOB_TOTAL == JOB_INDEX]
+    accounts = _interleave_by_reply_slot(accounts)
     logger.info(f"Job {JOB_INDEX + 1}/{JOB_TOTAL} | Assigned {len(accounts)}/{len(all_accounts)} accounts")
 
     total = len(accounts)
@@ -1061,14 +1185,20 @@ if __name__ == "__main__":
     rate_limited_queue = []  # accounts to retry after rate limit
 
     # Build set of bot usernames for reply anti-sockpuppet filtering
-    bot_usernames = {a.get("username", "") for a in all_accounts if a.get("username")}
+    # Lowercased once here; reply_engine matches against it case-insensitively
+    bot_usernames = frozenset(a["username"].lower() for a in all_accounts if a.get("username"))
     # Shared sets within this job to prevent same-IP collisions
     used_topics = set()
     used_phrases = set()
 
-    # Process accounts one by one with delay to avoid rate limiting
-    ACCOUNT_DELAY = int(os.environ.get("ACCOUNT_DELAY") or "60")  # seconds between accounts
-    logger.info(f"Total accounts: {total} | Delay between accounts: {ACCOUNT_DELAY}s")
+    if ACCOUNT_CONCURRENCY <= 1:
+        start_delay = (ACCOUNT_DELAY, ACCOUNT_DELAY + 15)
+        logger.info(f"Total accounts: {total} | Delay between accounts: {ACCOUNT_DELAY}-{ACCOUNT_DELAY + 15}s")
+    else:
+        start_delay = (0, ACCOUNT_DELAY)
+        logger.info(f"Total accounts: {total} | Start jitter: 0-{ACCOUNT_DELAY}s")
+    # Set once an account actually starts (skipped already-done ones don't count)
+    account_started = threading.Event()
 
     # Load incremental status — skip accounts already completed today
     daily_status = _load_daily_status(JOB_INDEX)
@@ -1076,100 +1206,76 @@ if __name__ == "__main__":
     if already_done:
         logger.info(f"Incremental run: {len(already_done)} accounts already done today, will skip them")
 
-    for i, account in enumerate(accounts, 1):
+    def _record(status, username, outcome):
+        """Merge one account's outcome into the job results (thread-safe)."""
+        with _results_lock:
+            if status != "ok":
+                fail_list.append(username)
+                return
+            success_list.append(username)
+            _mark_done(JOB_INDEX, username, daily_status)
+            if outcome["reply_result"]:
+                replied_accounts.append(outcome["reply_result"])
+            if outcome["like_count"] > 0 or outcome["like_attempts"] > 0:
+                like_stats[username] = {"count": outcome["like_count"], "attempts": outcome["like_attempts"]}
+            if outcome["connect_info"]:
+                connect_infos[username] = outcome["connect_info"]
+
+    def _process_account_job(i, account):
+        """Worker: run one account, queue it on rate limit, else record its outcome."""
         username = account.get("username", "")
-        password = account.get("password", "")
-        if not username or not password:
-            logger.warning(f"[{i}/{total}] Skipping account with missing username/password")
-            fail_list.append(username or f"account_{i}")
-            continue
 
         # Skip accounts already completed in a previous run today
-        if username in already_done:
+        if username and username in already_done:
             logger.info(f"[{i}/{total}] Skipping {username} — already completed today")
-            success_list.append(username)
-            continue
-
-        logger.info(f"========== [{i}/{total}] Processing: {username} ==========")
-        _check_memory_and_cleanup()  # circuit-breaker: cleanup if memory > 90%
-        try:
-            browser = LinuxDoBrowser(username, password)
-            browser._bot_usernames = bot_usernames
-            browser._used_topics = used_topics
-            browser._used_phrases = used_phrases
-            browser.run()
-            if browser.login_success:
+            with _results_lock:
                 success_list.append(username)
-                _mark_done(JOB_INDEX, username, daily_status)
-                if browser.reply_result:
-                    replied_accounts.append(browser.reply_result)
-                if browser.like_count > 0 or browser.like_attempts > 0:
-                    like_stats[username] = {"count": browser.like_count, "attempts": browser.like_attempts}
-                if browser.connect_info:
-                    connect_infos[username] = browser.connect_info
-                logger.success(f"[{i}/{total}] Account {username} completed successfully (likes: {browser.like_count}/{browser.like_attempts})")
-            else:
-                fail_list.append(username)
-                logger.warning(f"[{i}/{total}] Account {username} login failed")
-        except Exception as e:
-            error_msg = str(e)
-            if "RATE_LIMITED" in error_msg:
-                # Extract wait time from error message
-                try:
-                    wait_secs = int(error_msg.split(":")[1])
-                except (IndexError, ValueError):
-                    wait_secs = 120
-                logger.warning(f"[{i}/{total}] Account {username} hit rate limit, queued for retry")
-                rate_limited_queue.append(account)
-                # Wait for the rate limit to expire, then continue
-                wait_secs = min(wait_secs + 30, 2100)  # add 30s buffer, cap at 35min
-                logger.info(f"Rate limit detected. Waiting {wait_secs}s before continuing...")
-                time.sleep(wait_secs)
-                continue  # skip the normal delay since we already waited
-            else:
-                logger.error(f"[{i}/{total}] Account {username} failed: {e}")
-                fail_list.append(username)
-
-        # Delay between accounts to avoid rate limiting
-        if i < total:
-            delay = random.uniform(ACCOUNT_DELAY, ACCOUNT_DELAY + 15)
-            logger.info(f"Waiting {delay:.1f}s before next account...")
-            time.sleep(delay)
+            return
+
+        # Sequentially, the first account that really runs starts right away, as before
+        with _results_lock:
+            start_now = ACCOUNT_CONCURRENCY <= 1 and not account_started.is_set()
+            account_started.set()
+
+        # Per-account PRNG stream — reproducible and not shared across worker threads
+        account_rng = random.Random(_account_seed(username, daily_seed))
+        status, username, outcome = _run_one(
+            account, i, total, bot_usernames, used_topics, used_phrases,
+            account_rng, delay_range=(0, 0) if start_now else start_delay,
+        )
+        if status != "rate_limited":
+            _record(status, username, outcome)
+            return
+
+        logger.warning(f"[{i}/{total}] Account {username} queued for retry")
+        with _results_lock:
+            rate_limited_queue.append(account)
+        # Pause every worker's next account start until the rate limit expires.
+        # Exponential in the number of hits this job has seen, capped at 35min.
+        wait_secs = limiter.backoff(limiter.rate_limit_hits, base=outcome["wait_secs"],
+                                    cap=2100, rng=account_rng)
+        limiter.note_rate_limited(pause_s=wait_secs)
+        logger.info(f"Rate limit detected. Pausing account starts for {wait_secs:.0f}s...")
+
+    # Process accounts in parallel, each worker with a jittered start to avoid rate limiting
+    logger.info(f"Processing with concurrency={ACCOUNT_CONCURRENCY}")
+    with ThreadPoolExecutor(max_workers=ACCOUNT_CONCURRENCY) as executor:
+        futures = [
+            executor.submit(_process_account_job, i, account)
+            for i, account in enumerate(accounts, 1)
+        ]
+        for future in as_completed(futures):
+            future.result()
 
-    # Retry rate-limited accounts
+    # Retry rate-limited accounts (one at a time; a second rate limit counts as failure)
     if rate_limited_queue:
         logger.info(f"========== Retrying {len(rate_limited_queue)} rate-limited accounts ==========")
         for i, account in enumerate(rate_limited_queue, 1):
-            username = account.get("username", "")
-            password = account.get("password", "")
-            logger.info(f"========== [Retry {i}/{len(rate_limited_queue)}] Processing: {username} ==========")
-            try:
-                browser = LinuxDoBrowser(username, password)
-                browser._bot_usernames = bot_usernames
-                browser._used_topics = used_topics
-                browser._used_phrases = used_phrases
-                browser.run()
-                if browser.login_success:
-                    success_list.append(username)
-                    _mark_done(JOB_INDEX, username, daily_status)
-                    if browser.reply_result:
-                        replied_accounts.append(browser.reply_result)
-                    if browser.like_count > 0 or browser.like_attempts > 0:
-                        like_stats[username] = {"count": browser.like_count, "attempts": browser.like_attempts}
-                    if browser.connect_info:
-                        connect_infos[username] = browser.connect_info
-                    logger.success(f"[Retry {i}] Account {username} completed successfully (likes: {browser.like_count}/{browser.like_attempts})")
-                else:
-                    fail_list.append(username)
-                    logger.warning(f"[Retry {i}] Account {username} login failed")
-            except Exception as e:
-                logger.error(f"[Retry {i}] Account {username} failed: {e}")
-                fail_list.append(username)
-
-            if i < len(rate_limited_queue):
-                delay = random.uniform(ACCOUNT_DELAY, ACCOUNT_DELAY + 15)
-                logger.info(f"Waiting {delay:.1f}s before next retry...")
-                time.sleep(delay)
+            account_rng = random.Random(_account_seed(account.get("username", ""), daily_seed))
+            _record(*_run_one(
+                account, i, len(rate_limited_queue), bot_usernames, used_topics, used_phrases,
+                account_rng, delay_range=(ACCOUNT_DELAY, ACCOUNT_DELAY + 15), retry=True,
+            ))
 
     logger.info("========== Summary ==========")
     logger.info(f"Total: {total} | Success: {len(success_list)} | Failed: {len(fail_list)} | Replies: {len(replied_accounts)}")
@@ -1192,6 +1298,9 @@ if __name__ == "__main__":
         "connect_infos": connect_infos,
     }
     results_file = f"results_job_{JOB_INDEX}.json"
-    with open(results_file, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False)
+    tmp_file = f"{results_file}.tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(json_dumps_bytes(results))
+    # Atomic rename: a runner killed mid-write never leaves a truncated results file
+    os.replace(tmp_file, results_file)
     logger.info(f"Results saved to {results_file}")
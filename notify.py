@@ -135,9 +135,13 @@ class NotificationManager:
             logger.error(f"Telegram 推送失败: {str(e)}")
             return False
 
+    def has_email_channel(self) -> bool:
+        """是否已配置邮件通知（EMAIL_ADDRESS 与 EMAIL_PASSWORD）"""
+        return bool(self.email_address and self.email_password)
+
     def send_email(self, title: str, message: str):
         """发送邮件通知"""
-        if not self.email_address or not self.email_password:
+        if not self.has_email_channel():
             logger.info("未配置 EMAIL_ADDRESS 或 EMAIL_PASSWORD，跳过邮件通知")
             return False
 
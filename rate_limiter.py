@@ -0,0 +1,117 @@
+"""Central pacing for human-like pauses and rate-limit backoff.
+
+All worker threads share the module-level `limiter`, so per-category spacing
+(e.g. at most one post every N seconds from this runner's IP) holds across
+accounts running in parallel.
+"""
+
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+# Minimum spacing between two releases of the same category, across all threads.
+# Categories not listed here only get their own jittered sleep.
+DEFAULT_MIN_GAPS = {
+    "account": 10.0,  # account start-ups from this runner
+    "post": 30.0,     # reply POSTs from this runner's IP
+}
+
+# A 429 / login rate limit seen within this window slows PAUSED_ON_RATE_LIMIT categories
+_RECENT_RATE_LIMIT_WINDOW = 300
+
+# Categories that stay paused until a noted rate limit expires (see note_rate_limited)
+# and are spread out further while one was seen recently
+PAUSED_ON_RATE_LIMIT = frozenset({"account"})
+
+
+class RateLimiter:
+    """Thread-safe jittered sleeps with per-category minimum gaps."""
+
+    def __init__(self, min_gaps: Optional[Dict[str, float]] = None):
+        self._min_gaps = dict(DEFAULT_MIN_GAPS if min_gaps is None else min_gaps)
+        self._guard = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._last_release: Dict[str, float] = {}
+        self._rate_limit_hits = 0
+        self._last_rate_limit_ts = 0.0
+        self._resume_at = 0.0  # monotonic time before which paused categories wait
+
+    def _lock_for(self, category: str) -> threading.Lock:
+        with self._guard:
+            lock = self._locks.get(category)
+            if lock is None:
+                lock = self._locks[category] = threading.Lock()
+            return lock
+
+    def acquire(self, category: str, min_s: float, max_s: float,
+                rng: random.Random = None) -> float:
+        """Sleep a random duration in [min_s, max_s], then honour the category gap.
+
+        Categories in PAUSED_ON_RATE_LIMIT first wait out any pause set by
+        note_rate_limited(), and get extra exponential jitter while a rate limit
+        was seen recently. Returns the total seconds slept.
+        """
+        rng = rng or random
+        delay = 0.0
+        if category in PAUSED_ON_RATE_LIMIT:
+            # Re-check after each sleep: another thread may have extended the pause
+            while True:
+                with self._guard:
+                    pause = self._resume_at - time.monotonic()
+                if pause <= 0:
+                    break
+                time.sleep(pause)
+                delay += pause
+
+        jitter = rng.uniform(min_s, max_s)
+        if category in PAUSED_ON_RATE_LIMIT:
+            # Only account starts get the extra spread: other categories' sleeps
+            # model a human action (e.g. the compose time reported in a post payload)
+            with self._guard:
+                hits = self._rate_limit_hits
+                recent = time.monotonic() - self._last_rate_limit_ts < _RECENT_RATE_LIMIT_WINDOW
+            if hits and recent:
+                jitter += rng.uniform(0, min(60.0, 2 ** hits))
+        time.sleep(jitter)
+        delay += jitter
+
+        gap = self._min_gaps.get(category, 0)
+        if gap:
+            with self._lock_for(category):
+                wait = self._last_release.get(category, 0.0) + gap - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                    delay += wait
+                self._last_release[category] = time.monotonic()
+        return delay
+
+    @property
+    def rate_limit_hits(self) -> int:
+        """Number of rate-limit hits recorded so far in this process."""
+        with self._guard:
+            return self._rate_limit_hits
+
+    def note_rate_limited(self, pause_s: float = 0.0) -> int:
+        """Record a rate-limit hit and pause PAUSED_ON_RATE_LIMIT categories for pause_s.
+
+        The pause is shared by every thread, so no worker starts a new account
+        until it expires; overlapping pauses keep the later resume time.
+        Returns the number of hits so far in this process.
+        """
+        with self._guard:
+            now = time.monotonic()
+            self._rate_limit_hits += 1
+            self._last_rate_limit_ts = now
+            self._resume_at = max(self._resume_at, now + pause_s)
+            return self._rate_limit_hits
+
+    @staticmethod
+    def backoff(attempt: int, base: float, cap: float,
+                rng: random.Random = None) -> float:
+        """Exponential backoff with jitter: min(cap, base * 2**attempt + U(0, base))."""
+        rng = rng or random
+        return min(cap, base * (2 ** attempt) + rng.uniform(0, base))
+
+
+limiter = RateLimiter()
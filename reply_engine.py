@@ -4,18 +4,23 @@ Each account replies on 2 random days per week, 1 reply per day, to 1 topic.
 Replies use preset natural Chinese phrases from REPLY_POOL.
 """
 
+import functools
 import hashlib
-import json
+import itertools
 import os
 import random
 import re
+import threading
 import time
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Optional, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 from loguru import logger
 
-REPLY_POOL = [
+from jsonutil import json_dumps, json_loads
+from rate_limiter import limiter
+
+REPLY_POOL = (
     # Check-in style
     "来了来了，每日打卡",
     "前排支持一下",
@@ -72,11 +77,15 @@ REPLY_POOL = [
     "我什么时候才能写出这种东西",
     "这波操作我给满分",
     "实名羡慕，什么时候能教教我",
-]
+)
+_REPLY_POOL_N = len(REPLY_POOL)
 
 # Beijing timezone (UTC+8)
 _BJT = timezone(timedelta(hours=8))
 
+# HTML tag stripper for post excerpts; [^<>] keeps matching linear on unclosed tags
+_HTML_TAG_RE = re.compile(r"<[^<>]*>")
+
 # LinuxDo category ID -> display name (used to give AI board-specific context)
 CATEGORY_MAP = {
     1: "bug反馈",
@@ -102,6 +111,78 @@ CATEGORY_MAP = {
 }
 
 
+# The pool is fixed, so each phrase's JSON string literal is encoded once at import
+_REPLY_POOL_JSON = {p: json_dumps(p) for p in REPLY_POOL}
+
+# Reply payload with the same key order as the dict it replaces
+_PAYLOAD_TEMPLATE = (
+    '{{"raw":{text},"topic_id":{tid},"typing_duration_msecs":{td},'
+    '"composer_open_duration_msecs":{cd},"nested_post":true}}'
+)
+
+
+# Lazily-created Gemini client, shared by all accounts/threads in this process
+_GENAI_CLIENT = None
+_GENAI_LOCK = threading.Lock()
+# Caps in-flight Gemini calls across account threads to stay under the RPM quota
+_GENAI_SLOTS = threading.BoundedSemaphore(max(1, int(os.environ.get("GEMINI_CONCURRENCY") or "5")))
+_GENAI_MAX_RETRIES = 3
+
+
+def _get_genai_client():
+    """Return the process-wide genai.Client, creating it on first use."""
+    global _GENAI_CLIENT
+    if _GENAI_CLIENT is None:
+        with _GENAI_LOCK:
+            if _GENAI_CLIENT is None:
+                from google import genai
+                _GENAI_CLIENT = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+    return _GENAI_CLIENT
+
+
+# Fixed instruction tail of the Gemini prompt
+_PROMPT_RULES = (
+    "写一句简短、自然、友善的中文评论。"
+    "要求：1. 不要带引号 2. 不要是机器人口吻 "
+    "3. 字数在 10-30 字之间 4. 可以适当带一点幽默或鼓励 "
+    "5. 如果帖子内容包含强烈的负面情绪（如愤怒、悲伤、抱怨、骂人），"
+    "请只输出 SKIP（不要回复这种帖子）。"
+    "只输出评论内容，不要有任何前缀或解释。"
+)
+
+
+@functools.lru_cache(maxsize=512)
+def _generate_reply_cached(title: str, content_excerpt: str, category_name: str) -> str:
+    """Call Gemini for one topic; memoized so retries of the same topic skip the API.
+
+    429s are retried with jittered exponential backoff. Raises on any other
+    API failure (exceptions are not cached).
+    """
+    context_part = f"\n帖子内容摘要：{content_excerpt}\n" if content_excerpt else ""
+    category_part = f"这是一个发布在【{category_name}】板块的帖子。" if category_name else ""
+    prompt = (
+        f"你是一个热心的技术论坛用户。{category_part}"
+        f"请根据帖子标题《{title}》，{context_part}"
+        + _PROMPT_RULES
+    )
+
+    client = _get_genai_client()
+    for attempt in range(_GENAI_MAX_RETRIES + 1):
+        try:
+            with _GENAI_SLOTS:
+                response = client.models.generate_content(
+                    model="gemma-3-27b-it",
+                    contents=prompt,
+                )
+            return response.text.strip().strip('"\'')
+        except Exception as e:
+            if getattr(e, "code", None) != 429 or attempt == _GENAI_MAX_RETRIES:
+                raise
+            wait = limiter.backoff(attempt, base=2.0, cap=30.0)
+            logger.info(f"[AI Reply] Gemini rate limited, retrying in {wait:.1f}s")
+            time.sleep(wait)
+
+
 def generate_semantic_reply(title: str, content_excerpt: str = "",
                             category_name: str = "") -> Optional[str]:
     """Use Gemini Flash to generate a context-aware reply based on topic title and content.
@@ -110,32 +191,11 @@ def generate_semantic_reply(title: str, content_excerpt: str = "",
     Returns "SKIP" if AI determines the post is too negative for a casual reply.
     Fallback to REPLY_POOL is handled by the caller.
     """
-    api_key = os.environ.get("GEMINI_API_KEY")
-    if not api_key:
+    if not os.environ.get("GEMINI_API_KEY"):
         return None
 
     try:
-        from google import genai
-        client = genai.Client(api_key=api_key)
-
-        context_part = f"\n帖子内容摘要：{content_excerpt}\n" if content_excerpt else ""
-        category_part = f"这是一个发布在【{category_name}】板块的帖子。" if category_name else ""
-        prompt = (
-            f"你是一个热心的技术论坛用户。{category_part}"
-            f"请根据帖子标题《{title}》，{context_part}"
-            "写一句简短、自然、友善的中文评论。"
-            "要求：1. 不要带引号 2. 不要是机器人口吻 "
-            "3. 字数在 10-30 字之间 4. 可以适当带一点幽默或鼓励 "
-            "5. 如果帖子内容包含强烈的负面情绪（如愤怒、悲伤、抱怨、骂人），"
-            "请只输出 SKIP（不要回复这种帖子）。"
-            "只输出评论内容，不要有任何前缀或解释。"
-        )
-
-        response = client.models.generate_content(
-            model="gemma-3-27b-it",
-            contents=prompt,
-        )
-        reply_text = response.text.strip().strip('"\'')
+        reply_text = _generate_reply_cached(title, content_excerpt, category_name)
 
         # Sentiment filter: AI returns "SKIP" for negative/hostile posts
         if reply_text.upper().startswith("SKIP"):
@@ -152,22 +212,43 @@ def generate_semantic_reply(title: str, content_excerpt: str = "",
         return None
 
 
+def stable_hash(key: str) -> int:
+    """Deterministic 64-bit int hash of a string (stable across processes, unlike hash()).
+
+    Every matrix job must derive the same schedule, so this sticks to hashlib
+    rather than an optionally-installed fast hash; callers are lru_cached anyway.
+    """
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+@functools.lru_cache(maxsize=4096)
 def get_reply_run(username: str) -> str:
     """Return 'morning' or 'evening' — which daily run this account replies in."""
-    h = int(hashlib.md5(username.encode()).hexdigest(), 16)
-    return "morning" if h % 2 == 0 else "evening"
+    return "morning" if stable_hash(username) % 2 == 0 else "evening"
+
+
+# Every sorted pair of distinct weekdays (21 of them), for get_active_days
+_DAY_PAIRS = tuple(itertools.combinations(range(7), 2))
 
 
-def get_active_days(username: str, week_number: int) -> list:
-    """Return 2 day indices (0=Mon..6=Sun) for this account this week."""
-    seed = int(hashlib.md5(f"{username}:{week_number}".encode()).hexdigest(), 16)
-    rng = random.Random(seed)
-    return sorted(rng.sample(range(7), 2))
+@functools.lru_cache(maxsize=4096)
+def get_active_days(username: str, week_number: int) -> Tuple[int, ...]:
+    """Return 2 day indices (0=Mon..6=Sun) for this account this week.
+
+    Indexes the 21 possible pairs with the 64-bit hash directly — no
+    random.Random per call; the modulo bias over 2**64 is negligible.
+    """
+    return _DAY_PAIRS[stable_hash(f"{username}:{week_number}") % len(_DAY_PAIRS)]
+
 
+def current_run_slot(now: datetime = None) -> str:
+    """Determine if this is a 'morning' or 'evening' run based on UTC hour.
 
-def _current_run_slot() -> str:
-    """Determine if this is a 'morning' or 'evening' run based on UTC hour."""
-    utc_hour = datetime.now(timezone.utc).hour
+    `now` may be any aware datetime; callers pass the one they already hold.
+    """
+    if now is None:
+        now = datetime.now(timezone.utc)
+    utc_hour = now.astimezone(timezone.utc).hour
     # cron 23 2 * * * (02:23 UTC) -> morning
     # cron 47 14 * * * (14:47 UTC) -> evening
     return "morning" if utc_hour < 10 else "evening"
@@ -179,49 +260,147 @@ def should_reply_today(username: str) -> bool:
     week_number = now_bjt.isocalendar()[1]
     weekday = now_bjt.weekday()  # 0=Mon..6=Sun
 
-    active_days = get_active_days(username, week_number)
-    if weekday not in active_days:
-        logger.info(f"[Reply] {username}: not an active day (active={active_days}, today={weekday})")
-        return False
-
+    # Slot first: it rules out half the accounts on any run with one cached lookup
     run_slot = get_reply_run(username)
-    current_slot = _current_run_slot()
+    current_slot = current_run_slot(now_bjt)
     if run_slot != current_slot:
         logger.info(f"[Reply] {username}: wrong run slot (assigned={run_slot}, current={current_slot})")
         return False
 
+    active_days = get_active_days(username, week_number)
+    if weekday not in active_days:
+        logger.info(f"[Reply] {username}: not an active day (active={active_days}, today={weekday})")
+        return False
+
     logger.info(f"[Reply] {username}: should reply today (day={weekday}, slot={current_slot})")
     return True
 
 
-def _fetch_topic_candidates(page, bot_usernames: set) -> list:
-    """Fetch /latest.json once and return filtered candidate list.
+# /latest.json changes slowly relative to one job's wall-clock, so every account in
+# the job can share one fetch. host -> (fetched_at, topics, uid_to_username)
+_LATEST_TTL = 60
+_latest_cache: Dict[str, Tuple[float, list, dict]] = {}
+_latest_lock = threading.Lock()
+# Discourse truncates topic_list posters to this many; a shorter list is the full participant set
+_LATEST_MAX_POSTERS = 5
+
+
+# Returned by _session_get_json when the request should be retried in the page
+_RETRY_IN_PAGE = object()
+
 
-    Returns list of dicts with 'id' and 'title', or empty list on failure.
+def _session_get_json(session, impersonate: str, path: str):
+    """GET a linux.do JSON endpoint over the curl_cffi session.
+
+    Returns the parsed body, None on a hard failure, or _RETRY_IN_PAGE when
+    Cloudflare challenged the request (403/503, HTML interstitial) or it raised.
     """
     try:
-        result = page.run_js("""
-            return fetch('/latest.json', {
-                headers: {'X-Requested-With': 'XMLHttpRequest'}
-            }).then(r => r.ok ? r.text() : '');
-        """)
-        if not result:
-            logger.warning("[Reply] Failed to fetch /latest.json via browser")
-            return []
+        resp = session.get(
+            f"https://linux.do{path}",
+            headers={"X-Requested-With": "XMLHttpRequest"},
+            impersonate=impersonate,
+            timeout=15,
+        )
+        if resp.status_code == 200:
+            try:
+                return json_loads(resp.content)
+            except ValueError:
+                # 200 with an HTML interstitial instead of JSON
+                logger.info(f"[Reply] GET {path}: non-JSON body, retrying via browser")
+        elif resp.status_code not in (403, 503):
+            # Decode only the preview for the log, never the whole body
+            preview = resp.content[:200].decode("utf-8", "replace")
+            logger.warning(f"[Reply] GET {path} failed: {resp.status_code} - {preview}")
+            return None
+        else:
+            logger.info(f"[Reply] GET {path}: Cloudflare {resp.status_code}, retrying via browser")
+    except Exception as e:
+        logger.info(f"[Reply] GET {path} via session failed ({e}), retrying via browser")
+    return _RETRY_IN_PAGE
+
+
+def _page_get_json(page, path: str):
+    """GET a linux.do JSON endpoint via fetch() inside the page; None on failure."""
+    result = page.run_js(f"""
+        return fetch({json_dumps(path)}, {{
+            headers: {{'X-Requested-With': 'XMLHttpRequest'}}
+        }}).then(r => r.ok ? r.text() : '');
+    """)
+    if not result:
+        return None
+    return json_loads(result)
 
-        data = json.loads(result)
-        topics = data.get("topic_list", {}).get("topics", [])
 
-        # Build user_id -> username map from top-level users array
-        users_list = data.get("users", [])
-        uid_to_username = {u["id"]: u["username"] for u in users_list if "id" in u and "username" in u}
-    except Exception as e:
-        logger.error(f"[Reply] Error fetching topics: {e}")
+def _get_json(browser, path: str):
+    """GET a linux.do JSON endpoint and return the parsed body, or None on failure.
+
+    Tries the curl_cffi session first (browser-impersonating TLS, cookies synced
+    after login) — one plain HTTP request instead of a JS fetch over CDP. Falls
+    back to fetch() inside the page when Cloudflare challenges the session or
+    the session is unavailable.
+    """
+    session = getattr(browser, "session", None)
+    if session is not None:
+        data = _session_get_json(session, getattr(browser, "_impersonate", "chrome"), path)
+        if data is not _RETRY_IN_PAGE:
+            return data
+    return _page_get_json(browser.page, path)
+
+
+def _fetch_latest(browser) -> Optional[Tuple[list, dict]]:
+    """Return (topics, uid_to_username) from /latest.json, cached for _LATEST_TTL seconds.
+
+    Returns None on failure (failures are not cached).
+    """
+    with _latest_lock:
+        cached = _latest_cache.get("linux.do")
+        if cached and time.time() - cached[0] < _LATEST_TTL:
+            return cached[1], cached[2]
+
+        # Fetch under the lock so parallel accounts wait for one request
+        try:
+            data = _get_json(browser, "/latest.json")
+            if not data:
+                logger.warning("[Reply] Failed to fetch /latest.json")
+                return None
+
+            topics = data.get("topic_list", {}).get("topics", [])
+
+            # Build user_id -> username map from top-level users array
+            uid_to_username = {}
+            for u in data.get("users", []):
+                uid = u.get("id")
+                name = u.get("username")
+                if uid is not None and name:
+                    uid_to_username[uid] = name
+        except Exception as e:
+            logger.error(f"[Reply] Error fetching topics: {e}")
+            return None
+
+        _latest_cache["linux.do"] = (time.time(), topics, uid_to_username)
+        return topics, uid_to_username
+
+
+def _fetch_topic_candidates(browser, bot_usernames: frozenset) -> list:
+    """Get /latest.json (shared across accounts, see _fetch_latest) and return filtered candidate list.
+
+    bot_usernames must already be lowercased (main.py normalizes it once per job).
+    Returns list of dicts with 'id', 'title', 'category_id' and the known
+    participants, or empty list on failure.
+    """
+    latest = _fetch_latest(browser)
+    if latest is None:
         return []
+    topics, uid_to_username = latest
 
-    now = datetime.now(timezone.utc)
+    # Topics created before this UTC instant are too old (>3 days). Discourse sends
+    # "YYYY-MM-DDTHH:MM:SS.sssZ", so comparing the first 19 chars as strings orders
+    # the same as comparing datetimes, without parsing anything.
+    cutoff_iso = (datetime.now(timezone.utc) - timedelta(days=3)).strftime("%Y-%m-%dT%H:%M:%S")
     candidates = []
 
+    # Checks ordered cheapest-first: flag lookups, date prefix compare, then poster scan
     for topic in topics:
         topic_id = topic.get("id")
 
@@ -229,73 +408,112 @@ def _fetch_topic_candidates(page, bot_usernames: set) -> list:
         if topic.get("pinned") or topic.get("pinned_globally"):
             continue
 
-        # Skip topics by bot accounts — resolve user_id to username via map
-        poster_username = ""
-        posters = topic.get("posters", [])
-        for p in posters:
-            if "Original Poster" in (p.get("description", "") or ""):
-                poster_username = uid_to_username.get(p.get("user_id"), "")
-                break
-        if poster_username in bot_usernames:
+        # Skip closed/archived topics
+        if topic.get("closed") or topic.get("archived"):
             continue
-        # Also skip if last poster is a bot (prevents bot-to-bot chains)
-        if topic.get("last_poster_username", "") in bot_usernames:
+
+        # Skip mega-threads (>100 replies)
+        if topic.get("posts_count", 0) > 100:
             continue
 
         # Skip topics older than 3 days
-        created_at = topic.get("created_at", "")
-        if created_at:
-            try:
-                created_time = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                age_days = (now - created_time).total_seconds() / 86400
-                if age_days > 3:
-                    continue
-            except (ValueError, TypeError):
-                continue
+        # (a timestamp too short to hold a full date-time is malformed: skip it too)
+        created_at = topic.get("created_at") or ""
+        if created_at and (len(created_at) < 19 or created_at[:19] < cutoff_iso):
+            continue
 
-        # Skip mega-threads (>100 replies)
-        if topic.get("posts_count", 0) > 100:
+        # Skip if last poster is a bot (prevents bot-to-bot chains) — a single
+        # lookup, so it runs before the posters scan
+        if (topic.get("last_poster_username") or "").lower() in bot_usernames:
             continue
 
-        # Skip closed/archived topics
-        if topic.get("closed") or topic.get("archived"):
+        # Skip topics by bot accounts — resolve user_id to username via map
+        poster_username = ""
+        for p in topic.get("posters", []):
+            if "Original Poster" in (p.get("description") or ""):
+                poster_username = uid_to_username.get(p.get("user_id"), "")
+                break
+        if poster_username.lower() in bot_usernames:
             continue
 
         title = topic.get("title", "")
         if topic_id:
-            candidates.append({"id": topic_id, "title": title})
+            posters = topic.get("posters", [])
+            participants = {uid_to_username.get(p.get("user_id"), "").lower() for p in posters}
+            participants.add((topic.get("last_poster_username") or "").lower())
+            candidates.append({
+                "id": topic_id,
+                "title": title,
+                "category_id": topic.get("category_id"),
+                "participants": frozenset(participants),
+                "participants_complete": len(posters) < _LATEST_MAX_POSTERS,
+            })
 
     return candidates
 
 
-def select_topic(page, bot_usernames: set, exclude_ids: set = None,
-                 _cached_candidates: list = None) -> Optional[Dict]:
-    """Pick a suitable topic for replying.
+def select_topic(candidates: list, exclude_ids: set = None,
+                 rng: random.Random = None) -> List[Dict]:
+    """Order candidates for replying, from the list fetched once per account.
 
-    If _cached_candidates is provided, picks from that list (avoids re-fetching).
-    Otherwise fetches /latest.json via browser JS.
-    Returns dict with 'id' and 'title', or None if no suitable topic found.
+    Drops topics in exclude_ids and shuffles the rest; callers take the next
+    pick with .pop(). Returns an empty list if no suitable topic is left.
     """
     if exclude_ids is None:
         exclude_ids = set()
+    if rng is None:
+        rng = random.Random()
 
-    candidates = _cached_candidates if _cached_candidates is not None else \
-        _fetch_topic_candidates(page, bot_usernames)
+    queue = [c for c in candidates if c["id"] not in exclude_ids]
+    if not queue:
+        logger.warning("[Reply] No suitable topics found")
+    rng.shuffle(queue)
+    return queue
 
-    # Filter out already-tried topics
-    filtered = [c for c in candidates if c["id"] not in exclude_ids]
 
-    if not filtered:
-        logger.warning("[Reply] No suitable topics found")
-        return None
+# used_topics / used_phrases are shared by every worker thread in the job. A pick is
+# reserved (check-and-add under this lock) when it is made, not when the post lands
+# 30-60s later, so two accounts can't choose the same topic or phrase meanwhile.
+_RESERVE_LOCK = threading.Lock()
+
+
+def _reserve(used: set, item) -> bool:
+    """Atomically claim item in a job-wide set; False if another account holds it."""
+    with _RESERVE_LOCK:
+        if item in used:
+            return False
+        used.add(item)
+        return True
+
+
+def _release(used: set, item) -> None:
+    """Give back a reservation made with _reserve (e.g. when the post failed)."""
+    with _RESERVE_LOCK:
+        used.discard(item)
 
-    # Pick a random candidate
-    chosen = random.choice(filtered)
-    logger.info(f"[Reply] Selected topic: [{chosen['id']}] {chosen['title']}")
-    return chosen
 
+def _reserve_pool_phrase(used_phrases: set, rng: random.Random) -> Tuple[str, bool]:
+    """Pick and claim a REPLY_POOL phrase not yet used in this job.
 
-def _check_topic_status(page, topic_id: int, username: str) -> dict:
+    Returns (phrase, reserved); reserved is False only when every phrase is
+    taken and one is reused, in which case there is nothing to release.
+    """
+    with _RESERVE_LOCK:
+        # used_phrases is small next to the pool, so rejection-sample before scanning
+        for _ in range(10):
+            phrase = REPLY_POOL[rng.randrange(_REPLY_POOL_N)]
+            if phrase not in used_phrases:
+                break
+        else:
+            available_phrases = tuple(p for p in REPLY_POOL if p not in used_phrases)
+            if not available_phrases:
+                return rng.choice(REPLY_POOL), False
+            phrase = rng.choice(available_phrases)
+        used_phrases.add(phrase)
+        return phrase, True
+
+
+def _check_topic_status(browser, topic_id: int, username: str) -> dict:
     """Check topic status: whether user already replied, plus extract first post content.
 
     Returns dict with:
@@ -305,16 +523,10 @@ def _check_topic_status(page, topic_id: int, username: str) -> dict:
     """
     result_dict = {"already_replied": False, "first_post_excerpt": "", "category_id": None}
     try:
-        result = page.run_js(f"""
-            return fetch('/t/{topic_id}.json', {{
-                headers: {{'X-Requested-With': 'XMLHttpRequest'}}
-            }}).then(r => r.ok ? r.text() : '');
-        """)
-        if not result:
+        data = _get_json(browser, f"/t/{topic_id}.json")
+        if not data:
             return result_dict
 
-        data = json.loads(result)
-
         # Extract category_id
         result_dict["category_id"] = data.get("category_id")
 
@@ -326,7 +538,7 @@ def _check_topic_status(page, topic_id: int, username: str) -> dict:
             # Prefer raw (markdown) over cooked (HTML)
             content = first_post.get("raw", "") or first_post.get("cooked", "")
             # Strip HTML tags if present
-            content = re.sub(r"<[^>]+>", "", content).strip()
+            content = _HTML_TAG_RE.sub("", content).strip()
             # Truncate to 200 chars
             if len(content) > 200:
                 content = content[:200] + "..."
@@ -349,33 +561,40 @@ def _check_topic_status(page, topic_id: int, username: str) -> dict:
     return result_dict
 
 
-def post_reply(page, topic_id: int, text: str, csrf_token: str) -> bool:
-    """Post a reply to a topic via browser JS fetch to bypass Cloudflare."""
-    typing_duration = random.randint(5000, 15000)
-    composer_duration = random.randint(10000, 30000)
+def _prepare_post(topic_id: int, text: str, csrf_token: str,
+                  rng: random.Random) -> Tuple[str, str, float]:
+    """Build the reply payload up front; returns (payload_json, csrf_json, compose_secs)."""
+    typing_duration = rng.randint(5000, 15000)
+    composer_duration = rng.randint(10000, 30000)
+
+    # Escaped for JS here so nothing is left to do after the compose wait;
+    # only AI-generated text needs encoding, pool phrases are pre-encoded
+    text_json = _REPLY_POOL_JSON.get(text) or json_dumps(text)
+    payload_json = _PAYLOAD_TEMPLATE.format(
+        text=text_json, tid=int(topic_id), td=typing_duration, cd=composer_duration,
+    )
+    return payload_json, json_dumps(csrf_token), composer_duration / 1000
 
-    # Simulate actual typing/composing time
-    wait_secs = composer_duration / 1000
-    logger.info(f"[Reply] Simulating compose time: {wait_secs:.1f}s")
-    time.sleep(wait_secs)
 
-    payload = {
-        "raw": text,
-        "topic_id": topic_id,
-        "typing_duration_msecs": typing_duration,
-        "composer_open_duration_msecs": composer_duration,
-        "nested_post": True,
-    }
+def post_reply(page, topic_id: int, text: str, csrf_token: str,
+               rng: random.Random = None) -> bool:
+    """Post a reply to a topic via browser JS fetch to bypass Cloudflare."""
+    if rng is None:
+        rng = random.Random()
+    payload_json, csrf_json, wait_secs = _prepare_post(topic_id, text, csrf_token, rng)
 
-    # Escape the payload for JS
-    payload_json = json.dumps(payload, ensure_ascii=False)
+    # Simulate actual typing/composing time. The limiter's post gap is measured
+    # after this sleep, so compose time of parallel accounts overlaps the gap
+    # instead of adding to it.
+    logger.info(f"[Reply] Simulating compose time: {wait_secs:.1f}s")
+    limiter.acquire("post", wait_secs, wait_secs, rng=rng)
 
     try:
         result = page.run_js(f"""
             return fetch('/posts.json', {{
                 method: 'POST',
                 headers: {{
-                    'X-CSRF-Token': '{csrf_token}',
+                    'X-CSRF-Token': {csrf_json},
                     'X-Requested-With': 'XMLHttpRequest',
                     'Content-Type': 'application/json'
                 }},
@@ -386,13 +605,13 @@ def post_reply(page, topic_id: int, text: str, csrf_token: str) -> bool:
             logger.error("[Reply] Post failed: no response from browser fetch")
             return False
 
-        resp = json.loads(result)
+        resp = json_loads(result)
         status = resp.get("status", 0)
         body = resp.get("body", "")
 
         if status == 200:
             try:
-                post_data = json.loads(body)
+                post_data = json_loads(body)
                 post_id = post_data.get("id", "?")
                 logger.success(f"[Reply] Posted successfully! post_id={post_id}, topic_id={topic_id}")
             except Exception:
@@ -406,26 +625,33 @@ def post_reply(page, topic_id: int, text: str, csrf_token: str) -> bool:
         return False
 
 
-def execute_reply(browser, bot_usernames: set = None, used_topics: set = None,
-                  used_phrases: set = None, force: bool = False) -> Optional[Dict]:
+def execute_reply(browser, bot_usernames: frozenset = None, used_topics: set = None,
+                  used_phrases: set = None, force: bool = False,
+                  rng: random.Random = None) -> Optional[Dict]:
     """Main entry point: decide whether to reply and do it.
 
     Args:
         browser: LinuxDoBrowser instance (needs .page, .username, ._csrf_token)
-        bot_usernames: set of usernames belonging to bot accounts (for filtering)
-        used_topics: set of topic IDs already replied to in this job (anti-same-IP detection)
-        used_phrases: set of phrases already used in this job (anti-duplicate detection)
+        bot_usernames: lowercased usernames belonging to bot accounts (for filtering)
+        used_topics: set of topic IDs claimed or replied to in this job (anti-same-IP
+            detection); shared across worker threads, only touched via _reserve/_release
+        used_phrases: set of phrases claimed or used in this job (anti-duplicate detection),
+            same sharing rules as used_topics
         force: if True, skip day/slot scheduling check (one-time force-reply mode)
+        rng: per-account PRNG (derived from the job's master seed); keeps
+            topic/phrase picks reproducible and off the shared global `random`
 
     Returns:
         Dict with reply details on success, None otherwise.
     """
     if bot_usernames is None:
-        bot_usernames = set()
+        bot_usernames = frozenset()
     if used_topics is None:
         used_topics = set()
     if used_phrases is None:
         used_phrases = set()
+    if rng is None:
+        rng = random.Random()
 
     username = browser.username
     if force:
@@ -441,7 +667,7 @@ def execute_reply(browser, bot_usernames: set = None, used_topics: set = None,
         if "linux.do" not in current_url:
             logger.info(f"[Reply] {username}: navigating back to linux.do (was on {current_url})")
             page.get("https://linux.do/")
-            time.sleep(random.uniform(2, 4))
+            limiter.acquire("navigate", 2, 4, rng=rng)
     except Exception as e:
         logger.warning(f"[Reply] {username}: domain check failed: {e}")
 
@@ -466,30 +692,38 @@ def execute_reply(browser, bot_usernames: set = None, used_topics: set = None,
         logger.warning(f"[Reply] {username}: no CSRF token available, skipping reply")
         return None
 
-    # Fetch topic candidates once, then pick from cached list in retry loop
-    cached_candidates = _fetch_topic_candidates(page, bot_usernames)
+    # Fetch topic candidates once, shuffle once, then pop picks in the retry loop
+    queue = select_topic(
+        _fetch_topic_candidates(browser, bot_usernames), exclude_ids=used_topics, rng=rng
+    )
 
     # Select a topic with retry loop (max 3 attempts)
-    tried_ids = set()
     topic = None
     topic_status = None
     for attempt in range(3):
-        candidate = select_topic(
-            page, bot_usernames, exclude_ids=tried_ids,
-            _cached_candidates=cached_candidates
-        )
-        if not candidate:
+        if not queue:
             break
-        tried_ids.add(candidate["id"])
+        candidate = queue.pop()
+        logger.info(f"[Reply] Selected topic: [{candidate['id']}] {candidate['title']}")
 
-        # Anti-detection: skip if another account in this job already replied to this topic
-        if candidate["id"] in used_topics:
+        if username.lower() in candidate["participants"]:
+            logger.info(f"[Reply] {username}: already replied to {candidate['id']}, retry {attempt+1}/3")
+            continue
+
+        # Anti-detection: claim the topic now so no other account in this job picks it
+        if not _reserve(used_topics, candidate["id"]):
             logger.info(f"[Reply] {username}: topic {candidate['id']} used by another account, retry {attempt+1}/3")
             continue
 
-        # Check topic status (already replied + extract first post content)
-        status = _check_topic_status(page, candidate["id"], username)
+        if candidate["participants_complete"] and not os.environ.get("GEMINI_API_KEY"):
+            # Posters list already proves we never replied, and no AI prompt needs the excerpt
+            status = {"already_replied": False, "first_post_excerpt": "",
+                      "category_id": candidate["category_id"]}
+        else:
+            # Check topic status (already replied + extract first post content)
+            status = _check_topic_status(browser, candidate["id"], username)
         if status["already_replied"]:
+            _release(used_topics, candidate["id"])
             logger.info(f"[Reply] {username}: already replied to {candidate['id']}, retry {attempt+1}/3")
             continue
 
@@ -514,17 +748,17 @@ def execute_reply(browser, bot_usernames: set = None, used_topics: set = None,
 
     # Sentiment filter: AI flagged this post as negative, skip entirely
     if reply_text == "SKIP":
+        _release(used_topics, topic_id)
         logger.info(f"[Reply] {username}: skipping topic {topic_id} (negative sentiment)")
         return None
 
     is_ai = reply_text is not None
 
-    if not reply_text:
-        # Fallback: pick a phrase that hasn't been used by another account in this job
-        available_phrases = [p for p in REPLY_POOL if p not in used_phrases]
-        if not available_phrases:
-            available_phrases = list(REPLY_POOL)
-        reply_text = random.choice(available_phrases)
+    if is_ai:
+        phrase_reserved = _reserve(used_phrases, reply_text)
+    else:
+        # Fallback: claim a phrase that no other account in this job has used
+        reply_text, phrase_reserved = _reserve_pool_phrase(used_phrases, rng)
 
     source = "AI" if is_ai else "pool"
     logger.info(f"[Reply] {username}: replying to topic {topic_id} ({source}): {reply_text}")
@@ -533,21 +767,41 @@ def execute_reply(browser, bot_usernames: set = None, used_topics: set = None,
     try:
         logger.info(f"[Reply] {username}: navigating to topic {topic_id} for read simulation")
         page.get(f"https://linux.do/t/{topic_id}")
-        time.sleep(random.uniform(2, 5))
-        for _ in range(random.randint(2, 4)):
-            page.run_js(f"window.scrollBy({{top: {random.randint(200, 600)}, behavior: 'smooth'}})")
-            time.sleep(random.uniform(1.5, 4))
-        page.run_js("window.scrollTo({top: document.body.scrollHeight, behavior: 'smooth'})")
-        time.sleep(random.uniform(1, 2))
+        limiter.acquire("navigate", 2, 5, rng=rng)
+        # Whole read-scroll sequence in one run_js: the page paces itself between
+        # steps, so there is a single CDP round-trip instead of one per scroll
+        steps = [[rng.randint(200, 600), int(rng.uniform(1.5, 4) * 1000)]
+                 for _ in range(rng.randint(2, 4))]
+        final_pause_ms = int(rng.uniform(1, 2) * 1000)
+        total_secs = (sum(d for _, d in steps) + final_pause_ms) / 1000
+        page.run_js(f"""
+            const sleep = ms => new Promise(r => setTimeout(r, ms));
+            return (async () => {{
+                for (const [top, pause] of {json_dumps(steps)}) {{
+                    window.scrollBy({{top: top, behavior: 'smooth'}});
+                    await sleep(pause);
+                }}
+                window.scrollTo({{top: document.body.scrollHeight, behavior: 'smooth'}});
+                await sleep({final_pause_ms});
+                return true;
+            }})();
+        """, timeout=total_secs + 10)
 
         # "Like what you reply to" — 80% chance to like OP before replying
-        if random.random() < 0.80:
+        if rng.random() < 0.80:
             try:
                 liked = page.run_js("""
-                    // Scroll back to top to find OP's like button
-                    window.scrollTo({top: 0, behavior: 'smooth'});
-                    // Wait a moment for scroll
-                    return new Promise(resolve => setTimeout(() => {
+                    // Scroll back to top to find OP's like button (no animation needed)
+                    window.scrollTo({top: 0, behavior: 'instant'});
+                    // Wait two paint frames for the scroll to settle; the 800ms
+                    // timer is only a fallback if rAF is throttled
+                    const afterScroll = fn => {
+                        let done = false;
+                        const run = () => { if (!done) { done = true; fn(); } };
+                        requestAnimationFrame(() => requestAnimationFrame(run));
+                        setTimeout(run, 800);
+                    };
+                    return new Promise(resolve => afterScroll(() => {
                         const firstPost = document.querySelector('article#post_1')
                                        || document.querySelector('.topic-post:first-child');
                         if (!firstPost) { resolve('no_post'); return; }
@@ -559,11 +813,11 @@ def execute_reply(browser, bot_usernames: set = None, used_topics: set = None,
                             { resolve('already_liked'); return; }
                         btn.click();
                         resolve('liked');
-                    }, 800));
+                    }));
                 """)
                 if liked == 'liked':
                     logger.info(f"[Reply] {username}: liked OP in topic {topic_id}")
-                    time.sleep(random.uniform(0.8, 2.0))
+                    limiter.acquire("like", 0.3, 0.8, rng=rng)
                 elif liked == 'already_liked':
                     logger.info(f"[Reply] {username}: OP already liked in topic {topic_id}")
                 else:
@@ -573,11 +827,9 @@ def execute_reply(browser, bot_usernames: set = None, used_topics: set = None,
     except Exception as e:
         logger.warning(f"[Reply] {username}: read simulation failed (non-fatal): {e}")
 
-    success = post_reply(page, topic_id, reply_text, csrf_token)
+    success = post_reply(page, topic_id, reply_text, csrf_token, rng=rng)
 
     if success:
-        used_topics.add(topic_id)
-        used_phrases.add(reply_text)
         return {
             "username": username,
             "topic_id": topic_id,
@@ -585,4 +837,8 @@ def execute_reply(browser, bot_usernames: set = None, used_topics: set = None,
             "reply_text": reply_text,
         }
 
+    # Nothing was posted: hand the topic and phrase back to the other accounts
+    _release(used_topics, topic_id)
+    if phrase_reserved:
+        _release(used_phrases, reply_text)
     return None
@@ -1,8 +1,11 @@
 """Collect results from all jobs and send a single summary email."""
-import glob
-import json
+import io
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from notify import NotificationManager
+from jsonutil import json_loads
 
 TRUST_LEVEL_NAMES = {
     0: "新用户 (TL0)",
@@ -12,6 +15,79 @@ TRUST_LEVEL_NAMES = {
     4: "领导者 (TL4)",
 }
 
+# Top-level artifact fields main() reads; everything else is discarded on load
+_SUMMARY_FIELDS = ("total", "success", "fail", "replied_accounts", "connect_infos")
+
+# Below this many artifacts, loading serially beats starting a pool
+_PARALLEL_MIN_FILES = 4
+
+# One reply entry in the summary (two lines: who/where, then the text)
+_REPLY_TMPL = "  - {username} -> {topic_title} (https://linux.do/t/{topic_id})\n    \"{reply_text}\"\n"
+
+# One connect-info table row in the summary
+_ROW_TMPL = "    {item}: {current} / {requirement}\n"
+
+
+def _load_results(path: str) -> dict:
+    """Parse one results_job_*.json artifact straight from bytes.
+
+    Only the fields the summary merges are kept (like_stats etc. are dropped
+    here rather than held across files).
+    """
+    data = json_loads(Path(path).read_bytes())
+    return {key: data[key] for key in _SUMMARY_FIELDS if key in data}
+
+
+def _render_table(table: list) -> str:
+    """Render connect-info rows, one "    item: current / requirement" line each."""
+    try:
+        # Rows written by main.py always carry all three keys
+        return "".join(map(_ROW_TMPL.format_map, table))
+    except KeyError:
+        # Older artifacts may have partial rows
+        return "".join([
+            _ROW_TMPL.format(
+                item=row.get("item", ""),
+                current=row.get("current", "0"),
+                requirement=row.get("requirement", "0"),
+            )
+            for row in table
+        ])
+
+
+def _find_result_files(root: str = "results") -> list:
+    """Return sorted paths of <root>/*/results_job_*.json (one artifact dir per job)."""
+    files = []
+    try:
+        with os.scandir(root) as dirs:
+            for d in dirs:
+                # Match glob's "*": hidden directories are skipped
+                if d.name.startswith(".") or not d.is_dir():
+                    continue
+                with os.scandir(d.path) as entries:
+                    for f in entries:
+                        name = f.name
+                        if name.startswith("results_job_") and name.endswith(".json"):
+                            files.append(f.path)
+    except FileNotFoundError:
+        return []
+    files.sort()
+    return files
+
+
+def _iter_results(files: list):
+    """Yield (path, data) for each artifact, in order.
+
+    Once there are enough files, reads and parses overlap on a thread pool;
+    merging stays with the caller, so output order is unchanged.
+    """
+    if len(files) < _PARALLEL_MIN_FILES:
+        for path in files:
+            yield path, _load_results(path)
+        return
+    with ThreadPoolExecutor(max_workers=min(32, len(files))) as executor:
+        yield from zip(files, executor.map(_load_results, files))
+
 
 def main():
     all_success = []
@@ -19,64 +95,79 @@ def main():
     all_replies = []
     all_connect_infos = {}  # username -> {trust_level, table: [{item, current, requirement}, ...]}
     total = 0
+    load_log = []  # per-file diagnostics, written in one go after the loop
 
     # Find all result files from job artifacts
-    for path in sorted(glob.glob("results/*/results_job_*.json")):
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+    for path, data in _iter_results(_find_result_files()):
+        success = data.get("success", ())
+        fail = data.get("fail", ())
+        replies = data.get("replied_accounts", ())
         total += data.get("total", 0)
-        all_success.extend(data.get("success", []))
-        all_fail.extend(data.get("fail", []))
-        all_replies.extend(data.get("replied_accounts", []))
+        all_success += success
+        all_fail += fail
+        all_replies += replies
         all_connect_infos.update(data.get("connect_infos", {}))
-        print(f"Loaded {path}: {len(data.get('success', []))} success, {len(data.get('fail', []))} fail, {len(data.get('replied_accounts', []))} replies")
+        load_log.append(f"Loaded {path}: {len(success)} success, {len(fail)} fail, {len(replies)} replies\n")
+    sys.stdout.writelines(load_log)
 
     if total == 0:
         print("No results found.")
         return
 
+    # The same account can land in several artifacts (retries, overlapping runs);
+    # keep first occurrences in order
+    all_success = list(dict.fromkeys(all_success))
+    all_fail = list(dict.fromkeys(all_fail))
+    unique_replies = {}
+    for r in all_replies:
+        unique_replies.setdefault((r["username"], r["topic_id"]), r)
+    all_replies = list(unique_replies.values())
+
     print(f"\nTotal: {total} | Success: {len(all_success)} | Failed: {len(all_fail)} | Replies: {len(all_replies)}")
 
-    summary_lines = [
-        f"Total: {total} | Success: {len(all_success)} | Failed: {len(all_fail)} | Replies: {len(all_replies)}",
-        "",
-        f"✅ Successful ({len(all_success)}):",
-    ]
-    summary_lines += [f"  - {u}" for u in all_success] if all_success else ["  (none)"]
-    summary_lines += ["", f"❌ Failed ({len(all_fail)}):"]
-    summary_lines += [f"  - {u}" for u in all_fail] if all_fail else ["  (none)"]
+    notifier = NotificationManager()
+    if not notifier.has_email_channel():
+        # Nothing would be sent, so don't build the body at all
+        print("Email not configured (EMAIL_ADDRESS / EMAIL_PASSWORD), skipping summary email.")
+        return
 
-    summary_lines += ["", f"💬 Replies ({len(all_replies)}):"]
+    buf = io.StringIO()
+    w = buf.write
+    w(f"Total: {total} | Success: {len(all_success)} | Failed: {len(all_fail)} | Replies: {len(all_replies)}\n")
+    w(f"\n✅ Successful ({len(all_success)}):\n")
+    if all_success:
+        buf.writelines([f"  - {u}\n" for u in all_success])
+    else:
+        w("  (none)\n")
+
+    w(f"\n❌ Failed ({len(all_fail)}):\n")
+    if all_fail:
+        buf.writelines([f"  - {u}\n" for u in all_fail])
+    else:
+        w("  (none)\n")
+
+    w(f"\n💬 Replies ({len(all_replies)}):\n")
     if all_replies:
-        for r in all_replies:
-            topic_url = f"https://linux.do/t/{r['topic_id']}"
-            summary_lines.append(f"  - {r['username']} -> {r['topic_title']} ({topic_url})")
-            summary_lines.append(f"    \"{r['reply_text']}\"")
+        buf.writelines([_REPLY_TMPL.format_map(r) for r in all_replies])
     else:
-        summary_lines.append("  (none)")
+        w("  (none)\n")
 
     # Account level & connect info section
-    summary_lines += ["", f"📊 Account Levels & Connect Info ({len(all_connect_infos)}):"]
+    w(f"\n📊 Account Levels & Connect Info ({len(all_connect_infos)}):\n")
     if all_connect_infos:
-        for username in sorted(all_connect_infos.keys()):
-            info = all_connect_infos[username]
+        level_names_get = TRUST_LEVEL_NAMES.get
+        # Keys are unique, so sorting the items only ever compares usernames
+        for username, info in sorted(all_connect_infos.items()):
             trust_level = info.get("trust_level")
-            level_name = TRUST_LEVEL_NAMES.get(trust_level, f"Unknown ({trust_level})")
-            summary_lines.append(f"  [{username}] Trust Level: {level_name}")
-
-            table = info.get("table", [])
-            if table:
-                for row in table:
-                    item = row.get("item", "")
-                    current = row.get("current", "0")
-                    requirement = row.get("requirement", "0")
-                    summary_lines.append(f"    {item}: {current} / {requirement}")
-            summary_lines.append("")  # blank line between accounts
+            level_name = level_names_get(trust_level) or f"Unknown ({trust_level})"
+            rows = _render_table(info.get("table", ()))
+            # One write per account: header, table rows, blank line between accounts
+            w(f"  [{username}] Trust Level: {level_name}\n{rows}\n")
     else:
-        summary_lines.append("  (none)")
+        w("  (none)\n")
 
-    notifier = NotificationManager()
-    notifier.send_email("LinuxDo Check-in Summary", "\n".join(summary_lines))
+    # Every line above ends in "\n"; drop the last one to match a "\n".join body
+    notifier.send_email("LinuxDo Check-in Summary", buf.getvalue()[:-1])
 
 
 if __name__ == "__main__":